@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, g
 from flask_cors import CORS
 import torch
 from torchvision import transforms
@@ -15,7 +15,8 @@ import struct
 
 # App
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": ["http://localhost:3000", "http://127.0.0.1:3000"]}})
+CORS(app, resources={r"/*": {"origins": ["http://localhost:3000", "http://127.0.0.1:3000"]}},
+     expose_headers=["X-Peak-RSS-MB", "X-Peak-RSS-Per-Request"])
 
 # ========= 1. LOAD MODEL ONCE ==========
 channels = 3
@@ -26,8 +27,14 @@ use_att_up = False
 use_att_down = True
 img_height = 256
 img_width = 256
+# Activation memory budget for inference in MB (unset/0 = no limit; /enhance_video then runs one frame at a time)
+memory_budget_mb = float(os.environ.get("MEMORY_BUDGET_MB", "0") or 0)
+memory_budget = int(memory_budget_mb * 1024 * 1024) or None
+# Upper bound on frames per /enhance_video inference batch when a budget is set
+max_video_batch = 16
 
 from models.raune_net import RauneNet
+from memory_tracking import PeakRssTracker, read_peak_rss_mb
 
 # Try to instantiate model to match saved weights strictly
 def _build_model_matching_weights():
@@ -63,6 +70,26 @@ def _build_model_matching_weights():
 model = _build_model_matching_weights()
 model.eval()
 
+if memory_budget:
+    per_sample_mb = model.estimate_activation_bytes(img_height, img_width) / (1024 * 1024)
+    if per_sample_mb > memory_budget_mb:
+        print(f"Warning: one {img_height}x{img_width} frame needs ~{per_sample_mb:.0f} MB of activations, "
+              f"above MEMORY_BUDGET_MB={memory_budget_mb:g}; running single frames anyway.")
+
+def video_batch_size(frame_width, frame_height):
+    """Frames per /enhance_video inference batch.
+
+    One frame at a time unless a memory budget is set. With a budget, each frame
+    is charged its model activations plus the decoded full-resolution RGB frame
+    and its input/output tensors, and the result is capped at `max_video_batch`.
+    """
+    if not memory_budget:
+        return 1
+    per_frame = (model.estimate_activation_bytes(img_height, img_width)
+                 + frame_width * frame_height * 3
+                 + 2 * channels * img_height * img_width * 4)
+    return max(1, min(max_video_batch, int(memory_budget // per_frame)))
+
 # ========= 2. FILE PROCESSING FUNCTIONS ==========
 def is_sonar_file(filename):
     """Check if file is a supported sonar format"""
@@ -127,14 +154,46 @@ def extract_video_frame(file_path, frame_number=0):
         cv2.putText(error_frame, 'Video Error', (70, 128), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         return Image.fromarray(error_frame)
 
-# ========= 3. PREPROCESSING ==========
+# ========= 3. MEMORY TRACKING ==========
+peak_rss_tracker = PeakRssTracker()
+
+# Endpoints whose peak RSS is recorded and returned in the X-Peak-RSS-MB header
+_tracked_endpoints = {"enhance_image", "enhance_video"}
+
+@app.before_request
+def _start_peak_rss_tracking():
+    if request.endpoint in _tracked_endpoints:
+        g.peak_rss_token = peak_rss_tracker.begin()
+
+@app.after_request
+def _record_peak_rss(response):
+    """Expose this request's peak RSS as headers.
+
+    X-Peak-RSS-Per-Request is "true" only if the high-water mark was reset at the
+    start of this request and no other tracked request overlapped it; otherwise
+    the value also covers other requests (or the whole process lifetime).
+    """
+    if "peak_rss_token" not in g:
+        return response
+    peak, per_request = peak_rss_tracker.record(g.peak_rss_token)
+    if peak is not None:
+        response.headers["X-Peak-RSS-MB"] = str(peak)
+        response.headers["X-Peak-RSS-Per-Request"] = "true" if per_request else "false"
+    return response
+
+@app.teardown_request
+def _finish_peak_rss_tracking(exc):
+    if "peak_rss_token" in g:
+        peak_rss_tracker.end()
+
+# ========= 4. PREPROCESSING ==========
 transform = transforms.Compose([
     transforms.Resize((img_height, img_width), transforms.InterpolationMode.BICUBIC),
     transforms.ToTensor(),
     transforms.Normalize((0.5, 0.5, 0.5), (0.5, 0.5, 0.5)),
 ])
 
-# ========= 4. INFERENCE API ==========
+# ========= 5. INFERENCE API ==========
 @app.route("/enhance", methods=["POST"])
 def enhance_image():
     if "image" not in request.files:
@@ -174,8 +233,7 @@ def enhance_image():
     # Optional passthrough to validate pipeline (set form field passthrough=true)
     passthrough = request.form.get("passthrough", "false").lower() == "true"
     # Inference
-    with torch.no_grad():
-        output = img_tensor if passthrough else model(img_tensor)
+    output = img_tensor if passthrough else model.infer(img_tensor, memory_budget=memory_budget)
 
     # De-normalize to [0,1]
     input_t = img_tensor.squeeze(0)
@@ -355,22 +413,14 @@ def enhance_video():
             vals.append(uqi_c)
         return _torch.stack(vals).mean().item()
 
-    # Process frames
-    try:
-        while True:
-            ret, frame_bgr = cap.read()
-            if not ret:
-                break
-
-            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-            pil_in = Image.fromarray(frame_rgb)
-            # Prepare tensors
-            in_tensor = transform(pil_in).unsqueeze(0)
-            with torch.no_grad():
-                out_tensor = model(in_tensor)
+    def _enhance_batch(frames):
+        # Prepare tensors and run one inference for the whole batch
+        in_batch = _torch.stack([transform(f) for f in frames])
+        out_batch = model.infer(in_batch, memory_budget=memory_budget)
 
-            in_t = _denorm(in_tensor.squeeze(0))
-            out_t = _denorm(out_tensor.squeeze(0))
+        for in_tensor, out_tensor in zip(in_batch, out_batch):
+            in_t = _denorm(in_tensor)
+            out_t = _denorm(out_tensor)
 
             # Metrics
             psnr_vals.append(_psnr(out_t, in_t))
@@ -383,6 +433,23 @@ def enhance_video():
             if (out_np.shape[1], out_np.shape[0]) != (width, height):
                 out_np = cv2.resize(out_np, (width, height), interpolation=cv2.INTER_CUBIC)
             writer.append_data(out_np)
+
+    # Process frames in batches sized for this video's resolution
+    batch_size = video_batch_size(width, height)
+    try:
+        frames = []
+        while True:
+            ret, frame_bgr = cap.read()
+            if not ret:
+                break
+
+            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+            frames.append(Image.fromarray(frame_rgb))
+            if len(frames) == batch_size:
+                _enhance_batch(frames)
+                frames = []
+        if frames:
+            _enhance_batch(frames)
     finally:
         cap.release()
         try:
@@ -455,6 +522,15 @@ def process_video():
         # Keep temp file for frame extraction, will be cleaned up later
         pass
 
+@app.route("/memory_stats", methods=["GET"])
+def get_memory_stats():
+    """Return peak RSS observed across enhancement requests, for deployment sizing"""
+    stats = peak_rss_tracker.snapshot()
+    stats["memory_budget_mb"] = memory_budget_mb or None
+    peak = read_peak_rss_mb()
+    stats["current_peak_rss_mb"] = round(peak, 1) if peak is not None else None
+    return jsonify(stats)
+
 @app.route("/supported_formats", methods=["GET"])
 def get_supported_formats():
     """Return list of supported file formats"""
@@ -464,6 +540,6 @@ def get_supported_formats():
         "sonar_formats": [".xtf", ".sdf", ".s7k", ".raw", ".kcd"]
     })
 
-# ========= 5. RUN SERVER ==========
+# ========= 6. RUN SERVER ==========
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)
\ No newline at end of file
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make backend modules (e.g. `models.raune_net`, `memory_tracking`) importable in tests
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
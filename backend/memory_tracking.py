@@ -0,0 +1,91 @@
+import sys
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS high-water mark (Linux only). Returns True on success."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def read_peak_rss_mb():
+    """Peak RSS of this process in MB, or None if the platform does not report it"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+class PeakRssTracker:
+    """Per-request peak RSS bookkeeping for a threaded server.
+
+    The process has a single high-water mark, so it is only reset when no other
+    tracked request is running, and a result counts as per-request only if no
+    other tracked request overlapped it.
+    """
+    def __init__(self, reset=reset_peak_rss, read=read_peak_rss_mb):
+        """Initializes the tracker.
+
+        Args:
+            reset: Callable resetting the high-water mark; returns True on success.
+            read: Callable returning the current peak RSS in MB, or None.
+        """
+        self._reset = reset
+        self._read = read
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._started = 0
+        self.stats = {"requests": 0, "last_peak_rss_mb": None, "max_peak_rss_mb": None}
+
+    def begin(self):
+        """Marks a tracked request as started and returns its token for `record`."""
+        with self._lock:
+            self._in_flight += 1
+            self._started += 1
+            reset_ok = self._in_flight == 1 and self._reset()
+            return {"seq": self._started, "reset": bool(reset_ok)}
+
+    def record(self, token):
+        """Reads the peak for the request holding `token` and folds it into `stats`.
+
+        Returns `(peak_rss_mb, per_request)`; `peak_rss_mb` is None when the
+        platform does not report RSS, in which case `stats` is left untouched.
+        """
+        with self._lock:
+            peak = self._read()
+            per_request = (token["reset"] and self._in_flight == 1
+                           and self._started == token["seq"])
+            if peak is None:
+                return None, False
+            peak = round(peak, 1)
+            self.stats["requests"] += 1
+            self.stats["last_peak_rss_mb"] = peak
+            self.stats["max_peak_rss_mb"] = max(self.stats["max_peak_rss_mb"] or 0, peak)
+            return peak, per_request
+
+    def end(self):
+        """Marks a tracked request as finished. Must run even if the request failed."""
+        with self._lock:
+            self._in_flight -= 1
+
+    def snapshot(self):
+        """Returns a copy of `stats`."""
+        with self._lock:
+            return dict(self.stats)
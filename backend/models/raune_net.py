@@ -1,5 +1,9 @@
+import math
+import threading
+
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 # Try to import dependencies; provide minimal fallbacks if missing
 try:
@@ -107,6 +111,11 @@ class RauneNet(nn.Module):
         assert (n_blocks >= 0 and n_down >= 0)
         super().__init__()
         use_bias = False if norm_layer else True
+        self.n_down = n_down
+        self.ngf = ngf
+
+        # Serializes `infer` calls so concurrent requests don't stack their activations
+        self._infer_lock = threading.Lock()
 
         print(f"Initializing RauneNet with ngf={ngf}")  # Debug print statement
 
@@ -194,4 +203,91 @@ class RauneNet(nn.Module):
         Args:
             input: Input images. Type of `torch.Tensor`.
         """
-        return self.model(input)
\ No newline at end of file
+        return self.model(input)
+
+    def estimate_activation_bytes(self, height, width, dtype=torch.float32):
+        """Rough per-sample peak activation size of `infer`, in bytes.
+
+        The full-resolution stages (WRPM and the last up-sampling block feeding
+        the FMSM) dominate: about four `ngf`-channel maps are alive at once there.
+        In the residual trunk the block input and the conv block's intermediate
+        maps are alive together.
+
+        Args:
+            height: Input height in pixels.
+            width: Input width in pixels.
+            dtype: Activation dtype.
+        """
+        elem_size = torch.empty((), dtype=dtype).element_size()
+        scale = 2 ** self.n_down
+        full_res = self.ngf * (height + 6) * (width + 6)
+        trunk = self.ngf * scale * math.ceil(height / scale) * math.ceil(width / scale)
+        return elem_size * (4 * full_res + 3 * trunk)
+
+    def max_batch_for_budget(self, height, width, memory_budget, dtype=torch.float32):
+        """Largest batch size whose estimated activations fit in `memory_budget` bytes.
+
+        Never returns less than 1: a single image is always processed whole, since
+        splitting it into tiles would change the InstanceNorm statistics.
+
+        Args:
+            height: Input height in pixels.
+            width: Input width in pixels.
+            memory_budget: Activation memory budget in bytes.
+            dtype: Activation dtype.
+        """
+        per_sample = self.estimate_activation_bytes(height, width, dtype=dtype)
+        return max(1, int(memory_budget // per_sample))
+
+    def infer(self, input, memory_budget=None):
+        """Memory-bounded inference, numerically equivalent to `forward`.
+
+        Peak memory is bounded by splitting the batch into chunks sized from
+        `memory_budget` and by the per-instance lock, which keeps concurrent
+        calls from stacking their activations. Activations and residual adds
+        run in place, which only avoids some short-lived extra maps; convs,
+        norms and pads still allocate their outputs while their inputs are alive.
+
+        Args:
+            input: Input images. Type of `torch.Tensor`.
+            memory_budget: Activation memory budget in bytes. `None` runs the
+                whole batch at once.
+        """
+        n, _, h, w = input.shape
+        if memory_budget:
+            batch_size = self.max_batch_for_budget(h, w, memory_budget, dtype=input.dtype)
+        else:
+            batch_size = n
+
+        with self._infer_lock, torch.no_grad():
+            if batch_size >= n:
+                return self._bounded_forward(input)
+            output = None
+            for start in range(0, n, batch_size):
+                chunk = self._bounded_forward(input[start:start + batch_size])
+                if output is None:
+                    output = chunk.new_empty((n,) + chunk.shape[1:])
+                output[start:start + chunk.shape[0]].copy_(chunk)
+                del chunk
+            return output
+
+    def _bounded_forward(self, x):
+        """Layer-by-layer forward pass used by `infer`. Must run under `no_grad`."""
+        for block in self.model:
+            if isinstance(block, ResnetBlock) and hasattr(block, 'conv_block'):
+                h = block.conv_block(x)
+                h.add_(x)
+                x = h
+            elif isinstance(block, nn.Sequential):
+                for i, layer in enumerate(block):
+                    # The first layer may receive the caller's tensor, so only
+                    # activations on freshly produced maps run in place.
+                    if i > 0 and type(layer) is nn.ReLU:
+                        x = F.relu_(x)
+                    elif i > 0 and type(layer) is nn.LeakyReLU:
+                        x = F.leaky_relu_(x, layer.negative_slope)
+                    else:
+                        x = layer(x)
+            else:
+                x = block(x)
+        return x
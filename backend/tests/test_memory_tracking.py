@@ -0,0 +1,81 @@
+from memory_tracking import PeakRssTracker, read_peak_rss_mb
+
+
+class _FakeRss:
+    def __init__(self, peak=100.0, can_reset=True):
+        self.peak = peak
+        self.can_reset = can_reset
+        self.resets = 0
+
+    def reset(self):
+        if self.can_reset:
+            self.resets += 1
+        return self.can_reset
+
+    def read(self):
+        return self.peak
+
+
+def _tracker(rss):
+    return PeakRssTracker(reset=rss.reset, read=rss.read)
+
+
+def test_sequential_requests_are_per_request():
+    rss = _FakeRss()
+    tracker = _tracker(rss)
+    for peak in (120.0, 80.0):
+        token = tracker.begin()
+        rss.peak = peak
+        assert tracker.record(token) == (peak, True)
+        tracker.end()
+
+    assert rss.resets == 2
+    assert tracker.snapshot() == {"requests": 2, "last_peak_rss_mb": 80.0, "max_peak_rss_mb": 120.0}
+
+
+def test_overlapping_requests_are_not_per_request():
+    rss = _FakeRss()
+    tracker = _tracker(rss)
+    first = tracker.begin()
+    second = tracker.begin()
+    # The second request must not erase the first one's high-water mark
+    assert rss.resets == 1
+
+    assert tracker.record(first) == (100.0, False)
+    tracker.end()
+    assert tracker.record(second) == (100.0, False)
+    tracker.end()
+
+
+def test_request_started_during_another_marks_the_first_as_overlapped():
+    rss = _FakeRss()
+    tracker = _tracker(rss)
+    first = tracker.begin()
+    tracker.begin()
+    tracker.end()  # second finished (e.g. failed) before first records
+    assert tracker.record(first)[1] is False
+    tracker.end()
+
+    third = tracker.begin()
+    assert tracker.record(third)[1] is True
+    tracker.end()
+
+
+def test_failed_reset_is_not_per_request():
+    tracker = _tracker(_FakeRss(can_reset=False))
+    token = tracker.begin()
+    assert tracker.record(token) == (100.0, False)
+    tracker.end()
+
+
+def test_unreported_rss_leaves_stats_untouched():
+    tracker = _tracker(_FakeRss(peak=None))
+    token = tracker.begin()
+    assert tracker.record(token) == (None, False)
+    tracker.end()
+    assert tracker.snapshot()["requests"] == 0
+
+
+def test_read_peak_rss_mb_reports_positive_value():
+    peak = read_peak_rss_mb()
+    assert peak is None or peak > 0
@@ -0,0 +1,72 @@
+import torch
+
+from models.raune_net import RauneNet
+
+
+def _tiny_model():
+    torch.manual_seed(0)
+    model = RauneNet(3, 3, n_blocks=2, n_down=2, ngf=8)
+    model.eval()
+    return model
+
+
+def test_infer_matches_forward_with_uneven_chunks():
+    model = _tiny_model()
+    x = torch.randn(5, 3, 32, 32)
+    # Budget for two samples per chunk: chunks of 2, 2 and 1
+    budget = 2 * model.estimate_activation_bytes(32, 32)
+    assert model.max_batch_for_budget(32, 32, budget) == 2
+
+    with torch.no_grad():
+        expected = model(x)
+    actual = model.infer(x, memory_budget=budget)
+
+    assert actual.shape == expected.shape
+    assert torch.allclose(actual, expected, atol=1e-6)
+
+
+def test_infer_matches_forward_across_spatial_sizes():
+    model = _tiny_model()
+    for h, w in [(32, 32), (48, 40)]:
+        x = torch.randn(3, 3, h, w)
+        budget = model.estimate_activation_bytes(h, w)
+        with torch.no_grad():
+            expected = model(x)
+        actual = model.infer(x, memory_budget=budget)
+        assert torch.allclose(actual, expected, atol=1e-6)
+
+
+def test_infer_does_not_modify_input():
+    model = _tiny_model()
+    x = torch.randn(2, 3, 32, 32)
+    x_copy = x.clone()
+    model.infer(x)
+    assert torch.equal(x, x_copy)
+
+
+def test_max_batch_for_budget_is_at_least_one():
+    model = _tiny_model()
+    per_sample = model.estimate_activation_bytes(32, 32)
+    assert model.max_batch_for_budget(32, 32, per_sample // 2) == 1
+    assert model.max_batch_for_budget(32, 32, 1) == 1
+
+
+def test_infer_processes_budgeted_batch_in_chunks(monkeypatch):
+    model = _tiny_model()
+    chunk_sizes = []
+    bounded_forward = model._bounded_forward
+
+    def counting_forward(x):
+        chunk_sizes.append(x.shape[0])
+        return bounded_forward(x)
+
+    monkeypatch.setattr(model, "_bounded_forward", counting_forward)
+    x = torch.randn(7, 3, 32, 32)
+    out = model.infer(x, memory_budget=3 * model.estimate_activation_bytes(32, 32))
+
+    assert chunk_sizes == [3, 3, 1]
+    assert out.shape == (7, 3, 32, 32)
+
+    chunk_sizes.clear()
+    model.infer(x)
+    assert chunk_sizes == [7]